@@ -3,14 +3,21 @@ Vercel serverless function entry point for Flask app
 """
 import os
 import sys
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Set Vercel environment flag before importing app
-# This allows app.py to detect Vercel environment and use /tmp for database
-os.environ['VERCEL'] = '1'
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _project_root not in sys.path:
+    sys.path.insert(0, _project_root)
 
-# Import app (database configuration happens in app.py based on VERCEL env var)
-from app import app
+# Import app (database configuration happens in app.py based on the VERCEL
+# env var, which the platform sets and vercel.json declares)
+from app import app as app
+
+__all__ = ['app']
+
+# Compile the Jinja templates while the cold start is already being paid for,
+# so the first user-facing request does not have to
+for _template_name in app.jinja_env.list_templates():
+    app.jinja_env.get_template(_template_name)
 
 # Vercel Python runtime expects the Flask app to be exported directly
 # The app will be called as a WSGI application
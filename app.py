@@ -1,31 +1,49 @@
 from __future__ import annotations
 
 import csv
+import importlib.util
 import io
 import json
 import math
 import os
 import shutil
+import sqlite3
+import time
+import uuid
 from datetime import date, datetime
+from functools import lru_cache, wraps
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
 from flask import (
     Flask,
     Response,
+    abort,
     flash,
+    g,
     jsonify,
     redirect,
     render_template,
     request,
+    stream_with_context,
     url_for,
 )
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import inspect, text
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup
+from sqlalchemy import delete, event, inspect, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Session, contains_eager, joinedload, raiseload, selectinload
 import bcrypt
+import orjson
 from werkzeug.utils import secure_filename
 
+IS_VERCEL = bool(os.environ.get('VERCEL') or os.environ.get('VERCEL_ENV'))
+
 # Use absolute paths for static and template folders to work in Vercel serverless
 _app_root = Path(__file__).resolve().parent
 app = Flask(
@@ -34,6 +52,9 @@ app = Flask(
     static_url_path='/static',
     template_folder=str(_app_root / 'templates')
 )
+# Keep compiled templates in the temp directory so a fresh worker can skip
+# parsing the template sources
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
 
 # Database configuration: Support Turso (libSQL) or local SQLite
 database_url = os.environ.get('DATABASE_URL')
@@ -41,14 +62,25 @@ if database_url:
     # Turso/libSQL connection string (libsql:// or turso://)
     # For Turso, use the connection string directly
     if database_url.startswith('libsql://') or database_url.startswith('turso://'):
-        # Convert Turso URL to SQLAlchemy format if needed
-        # Turso uses libSQL which is SQLite-compatible
-        # For now, we'll use the URL as-is (may need libsql-client for actual connection)
-        app.config["SQLALCHEMY_DATABASE_URI"] = database_url.replace('libsql://', 'sqlite:///').replace('turso://', 'sqlite:///')
+        # Connect to the remote database through the sqlalchemy-libsql dialect
+        # (listed in requirements.txt). Rewriting to sqlite:/// would only
+        # open a local file named after the host.
+        if importlib.util.find_spec('sqlalchemy_libsql') is None:
+            raise RuntimeError(
+                "DATABASE_URL points at Turso/libSQL, but the sqlalchemy-libsql "
+                "package is not installed. Run `pip install -r requirements.txt`."
+            )
+        remote, _, query = database_url.split('://', 1)[1].partition('?')
+        params = [param for param in query.split('&') if param]
+        # Without secure=true the driver talks plain http/ws and sends the
+        # auth token unencrypted
+        if not any(param.startswith('secure=') for param in params):
+            params.append('secure=true')
+        app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite+libsql://{remote}?{'&'.join(params)}"
     else:
         # Standard SQLite URL format
         app.config["SQLALCHEMY_DATABASE_URI"] = database_url
-elif os.environ.get('VERCEL') or os.environ.get('VERCEL_ENV'):
+elif IS_VERCEL:
     # Vercel serverless environment: use /tmp
     db_path = '/tmp/cellsplitter.db'
     os.makedirs('/tmp', exist_ok=True)
@@ -60,10 +92,36 @@ else:
     db_path = instance_path / "cellsplitter.db"
     app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+# Room in the compiled-SQL cache for every distinct statement the routes emit
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"query_cache_size": 1200}
+if app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite+libsql://"):
+    # Reuse remote connections, but check and recycle them since the server
+    # may drop idle ones between serverless invocations
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"].update(pool_pre_ping=True, pool_recycle=300)
+    auth_token = os.environ.get('TURSO_AUTH_TOKEN')
+    if auth_token and 'authToken=' not in app.config["SQLALCHEMY_DATABASE_URI"]:
+        # Hand the token to the driver directly so it never appears in the URI
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"]["connect_args"] = {"auth_token": auth_token}
 app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY", "cellsplitter-secret-key")
 
+# bcrypt work factor for new password hashes; each step doubles the hashing time
+BCRYPT_COST = int(os.environ.get("BCRYPT_COST", "12"))
+
 db = SQLAlchemy(app)
 
+
+@event.listens_for(Engine, "connect")
+def configure_sqlite_connection(dbapi_connection, connection_record):
+    # WAL with synchronous=NORMAL avoids an fsync of the main database file on
+    # every commit, which is what bounds write throughput on SQLite
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
 # Initialize Flask-Login
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -133,21 +191,33 @@ MYCO_STATUS_CHOICES: list[tuple[str, str]] = [
     (MYCO_STATUS_CONTAMINATED, "Myco-contaminated"),
 ]
 
+# Every value normalize_myco_status returns has a label here, so callers with
+# an already-normalized status can index it directly.
+MYCO_STATUS_LABELS: dict[str, str] = dict(MYCO_STATUS_CHOICES)
+MYCO_STATUS_VALUES: frozenset[str] = frozenset(MYCO_STATUS_LABELS)
+
+# Stored value -> canonical status; the legacy "tested" value reads as free
+MYCO_STATUS_NORMALIZED: dict[str, str] = {
+    MYCO_STATUS_UNTESTED: MYCO_STATUS_UNTESTED,
+    MYCO_STATUS_TESTED: MYCO_STATUS_FREE,
+    MYCO_STATUS_FREE: MYCO_STATUS_FREE,
+    MYCO_STATUS_CONTAMINATED: MYCO_STATUS_CONTAMINATED,
+}
+
 MYCO_STATUS_DISPLAY_FALLBACK = {
     MYCO_STATUS_TESTED: "Myco-free",
 }
 
 
 def normalize_myco_status(value: Optional[str]) -> str:
-    if not value:
-        return MYCO_STATUS_UNTESTED
-    if value == MYCO_STATUS_TESTED:
-        return MYCO_STATUS_FREE
-    if value in {MYCO_STATUS_UNTESTED, MYCO_STATUS_FREE, MYCO_STATUS_CONTAMINATED}:
-        return value
-    return MYCO_STATUS_UNTESTED
+    # Empty and unknown values fall back to untested
+    return MYCO_STATUS_NORMALIZED.get(value, MYCO_STATUS_UNTESTED)
 
 
+# Vessel names come from a small reference table, so each distinct name only
+# has to be scanned against the hints once. A single regex alternation would
+# not keep the list-order priority (e.g. "6-well" winning inside "96-well").
+@lru_cache(maxsize=256)
 def suggest_slurry_volume(vessel_name: Optional[str]) -> Optional[float]:
     if not vessel_name:
         return None
@@ -167,16 +237,20 @@ class CellLine(db.Model):
     notes = db.Column(db.Text, nullable=True)
     cultures = db.relationship("Culture", back_populates="cell_line")
 
-    @property
+    @hybrid_property
     def average_doubling_time(self) -> Optional[float]:
-        values = [
-            value
-            for value in (self.doubling_time_min_hours, self.doubling_time_max_hours)
-            if value
-        ]
-        if not values:
-            return None
-        return sum(values) / len(values)
+        low = self.doubling_time_min_hours
+        high = self.doubling_time_max_hours
+        if low and high:
+            return (low + high) / 2
+        return low or high or None
+
+    @average_doubling_time.expression
+    def average_doubling_time(cls):
+        # Zero is treated as "not specified", matching the Python branch above.
+        low = db.func.nullif(cls.doubling_time_min_hours, 0)
+        high = db.func.nullif(cls.doubling_time_max_hours, 0)
+        return (db.func.coalesce(low, high) + db.func.coalesce(high, low)) / 2.0
 
     def display_doubling_time(self) -> str:
         low = self.doubling_time_min_hours
@@ -191,6 +265,11 @@ class CellLine(db.Model):
 
 
 class Culture(db.Model):
+    __table_args__ = (
+        # Dashboard lists: one user's active or ended cultures, ordered by name
+        db.Index("ix_culture_user_ended_name", "user_id", "ended_on", "name"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
     cell_line_id = db.Column(db.Integer, db.ForeignKey("cell_line.id"), nullable=False)
@@ -205,7 +284,7 @@ class Culture(db.Model):
     measured_viability_percent = db.Column(db.Integer, nullable=True)
     end_reason = db.Column(db.Text, nullable=True)
     
-    user = db.relationship("User", backref="cultures")
+    user = db.relationship("User", back_populates="cultures")
     cell_line = db.relationship("CellLine", back_populates="cultures")
     passages = db.relationship(
         "Passage",
@@ -216,22 +295,43 @@ class Culture(db.Model):
 
     @property
     def latest_passage(self) -> Optional["Passage"]:
+        if self.id is not None and "passages" in inspect(self).unloaded:
+            # Read just the top row via ix_passage_culture_num rather than
+            # loading every passage to keep the last one
+            return (
+                Passage.query.filter(Passage.culture_id == self.id)
+                .order_by(Passage.passage_number.desc())
+                .first()
+            )
+        # ``passages`` is loaded ordered by passage_number, and new passages are
+        # always appended with the next number, so the last entry is the latest.
         if not self.passages:
             return None
-        return max(self.passages, key=lambda passage: passage.passage_number)
+        return self.passages[-1]
 
     @property
     def next_passage_number(self) -> int:
+        if self.id is not None and "passages" in inspect(self).unloaded:
+            return self.compute_next_passage_number()
         latest = self.latest_passage
         if latest is None:
             return 1
         return latest.passage_number + 1
 
+    def compute_next_passage_number(self) -> int:
+        """Next passage number from a scalar MAX query, without loading passages."""
+        highest = (
+            db.session.query(db.func.max(Passage.passage_number))
+            .filter(Passage.culture_id == self.id)
+            .scalar()
+        )
+        return (highest or 0) + 1
+
     @property
     def is_active(self) -> bool:
         return self.ended_on is None
 
-    @property
+    @hybrid_property
     def measured_cells_total(self) -> Optional[float]:
         if (
             self.measured_cell_concentration
@@ -241,6 +341,21 @@ class Culture(db.Model):
             return self.measured_cell_concentration * self.measured_slurry_volume_ml
         return None
 
+    @measured_cells_total.expression
+    def measured_cells_total(cls):
+        # NULL unless both measurements are present, matching the Python branch
+        # (a zero concentration counts as missing, the volume must be positive).
+        return db.case(
+            (
+                db.and_(
+                    cls.measured_cell_concentration != 0,
+                    cls.measured_slurry_volume_ml > 0,
+                ),
+                cls.measured_cell_concentration * cls.measured_slurry_volume_ml,
+            ),
+            else_=None,
+        )
+
     @property
     def current_myco_status(self) -> str:
         latest = self.latest_passage
@@ -250,8 +365,12 @@ class Culture(db.Model):
 
 
 class Passage(db.Model):
+    __table_args__ = (
+        db.Index("ix_passage_culture_num", "culture_id", "passage_number"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    culture_id = db.Column(db.Integer, db.ForeignKey("culture.id"), nullable=False)
+    culture_id = db.Column(db.Integer, db.ForeignKey("culture.id", ondelete="CASCADE"), nullable=False)
     passage_number = db.Column(db.Integer, nullable=False)
     date = db.Column(db.Date, nullable=False, default=date.today)
     media = db.Column(db.Text, nullable=True)
@@ -284,132 +403,190 @@ class User(UserMixin, db.Model):
     email = db.Column(db.String(120), nullable=False, unique=True)
     password_hash = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    cultures = db.relationship("Culture", back_populates="user")
 
     def set_password(self, password: str) -> None:
         """Hash and set password"""
-        salt = bcrypt.gensalt()
+        salt = bcrypt.gensalt(rounds=BCRYPT_COST)
         self.password_hash = bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
     def check_password(self, password: str) -> bool:
         """Verify password"""
         return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
 
+    def password_needs_rehash(self) -> bool:
+        """Whether the stored hash was made with a different cost than BCRYPT_COST"""
+        # bcrypt hashes look like $2b$12$<salt+digest>
+        parts = self.password_hash.split('$')
+        return len(parts) < 4 or parts[2] != f"{BCRYPT_COST:02d}"
+
 
 class Setting(db.Model):
     key = db.Column(db.String(64), primary_key=True)
     value = db.Column(db.String(255), nullable=True)
 
+    @staticmethod
+    def all_values() -> dict[str, Optional[str]]:
+        """Every setting, read in one query and kept for the rest of the request."""
+        values = g.get("_settings")
+        if values is None:
+            values = dict(db.session.query(Setting.key, Setting.value).all())
+            g._settings = values
+        return values
+
     @staticmethod
     def get_value(key: str, default: Optional[str] = None) -> Optional[str]:
-        record = Setting.query.get(key)
-        if record is None:
+        values = Setting.all_values()
+        if key not in values:
             return default
-        return record.value
+        return values[key]
 
     @staticmethod
     def set_value(key: str, value: Optional[str]) -> None:
-        record = Setting.query.get(key)
-        if record is None:
-            record = Setting(key=key, value=value)
-            db.session.add(record)
+        insert_for_dialect = SETTING_UPSERT_INSERTS.get(db.engine.dialect.name)
+        if insert_for_dialect is not None:
+            # One INSERT ... ON CONFLICT statement instead of SELECT then write
+            statement = insert_for_dialect(Setting).values(key=key, value=value)
+            statement = statement.on_conflict_do_update(
+                index_elements=[Setting.key], set_={"value": statement.excluded.value}
+            )
+            db.session.execute(statement)
         else:
-            record.value = value
+            record = Setting.query.get(key)
+            if record is None:
+                record = Setting(key=key, value=value)
+                db.session.add(record)
+            else:
+                record.value = value
         db.session.commit()
+        values = g.get("_settings")
+        if values is not None:
+            values[key] = value
+
+
+# Dialects whose insert() supports on_conflict_do_update, used by Setting.set_value
+SETTING_UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
 
 
+@lru_cache(maxsize=None)
 def load_json_data(filename: str) -> list[dict]:
+    # Cached per filename; callers only iterate the records, never mutate them.
     data_path = _app_root / "data" / filename
-    with data_path.open("r", encoding="utf-8") as handle:
-        return json.load(handle)
+    return orjson.loads(data_path.read_bytes())
 
 
 def bootstrap_cell_lines() -> None:
     records = load_json_data("cell_lines.json")
-    existing_names = {name for (name,) in db.session.query(CellLine.name).all()}
-    for record in records:
-        if record["name"] in existing_names:
-            continue
-        cell_line = CellLine(
-            name=record["name"],
-            doubling_time_min_hours=record.get("doubling_time_min_hours"),
-            doubling_time_max_hours=record.get("doubling_time_max_hours"),
-            reference_url=record.get("reference_url"),
-            notes=record.get("notes"),
-        )
-        db.session.add(cell_line)
+    existing_names = set(db.session.scalars(select(CellLine.name)))
+    new_rows = [
+        {
+            "name": record["name"],
+            "doubling_time_min_hours": record.get("doubling_time_min_hours"),
+            "doubling_time_max_hours": record.get("doubling_time_max_hours"),
+            "reference_url": record.get("reference_url"),
+            "notes": record.get("notes"),
+        }
+        for record in records
+        if record["name"] not in existing_names
+    ]
+    if new_rows:
+        db.session.bulk_insert_mappings(CellLine, new_rows)
     db.session.commit()
 
 
 def bootstrap_vessels() -> None:
     records = load_json_data("vessels.json")
-    existing_names = {name for (name,) in db.session.query(Vessel.name).all()}
-    for record in records:
-        if record["name"] in existing_names:
-            continue
-        vessel = Vessel(
-            name=record["name"],
-            area_cm2=record["area_cm2"],
-            cells_at_100_confluency=record["cells_at_100_confluency"],
-            notes=record.get("notes"),
-        )
-        db.session.add(vessel)
+    existing_names = set(db.session.scalars(select(Vessel.name)))
+    new_rows = [
+        {
+            "name": record["name"],
+            "area_cm2": record["area_cm2"],
+            "cells_at_100_confluency": record["cells_at_100_confluency"],
+            "notes": record.get("notes"),
+        }
+        for record in records
+        if record["name"] not in existing_names
+    ]
+    if new_rows:
+        db.session.bulk_insert_mappings(Vessel, new_rows)
     db.session.commit()
 
 
-def setup_database() -> None:
-    try:
-        print(f"Database URI: {app.config['SQLALCHEMY_DATABASE_URI']}")
-        # Create all tables first
-        print("Calling db.create_all()...")
-        db.create_all()
-        print("db.create_all() completed.")
-        
-        # Ensure all tables exist (in case db.create_all() didn't create them)
-        inspector = inspect(db.engine)
-        required_tables = ["user", "culture", "passage", "cell_line", "vessel", "setting"]
-        existing_tables = inspector.get_table_names()
-        print(f"Existing tables after db.create_all(): {existing_tables}")
-        missing_tables = [t for t in required_tables if t not in existing_tables]
-        
-        if missing_tables:
-            print(f"Missing tables: {missing_tables}")
-            # Explicitly create missing tables using raw SQL if needed
-            with db.engine.begin() as connection:
-                if "user" not in existing_tables:
-                    print("Creating user table explicitly...")
-                    try:
-                        connection.execute(text("""
-                            CREATE TABLE IF NOT EXISTS user (
-                                id INTEGER NOT NULL PRIMARY KEY,
-                                email VARCHAR(120) NOT NULL UNIQUE,
-                                password_hash VARCHAR(255) NOT NULL,
-                                created_at DATETIME NOT NULL
-                            )
-                        """))
-                        print("User table creation SQL executed.")
-                    except Exception as e:
-                        print(f"Error creating user table: {e}")
-                        raise
-                if "setting" not in existing_tables:
-                    print("Creating setting table explicitly...")
+def ensure_tables() -> None:
+    # Create all tables first
+    print("Calling db.create_all()...")
+    db.create_all()
+    print("db.create_all() completed.")
+    
+    # Ensure all tables exist (in case db.create_all() didn't create them)
+    inspector = inspect(db.engine)
+    required_tables = ["user", "culture", "passage", "cell_line", "vessel", "setting"]
+    existing_tables = inspector.get_table_names()
+    print(f"Existing tables after db.create_all(): {existing_tables}")
+    missing_tables = [t for t in required_tables if t not in existing_tables]
+    
+    if missing_tables:
+        print(f"Missing tables: {missing_tables}")
+        # Explicitly create missing tables using raw SQL if needed
+        with db.engine.begin() as connection:
+            if "user" not in existing_tables:
+                print("Creating user table explicitly...")
+                try:
                     connection.execute(text("""
-                        CREATE TABLE IF NOT EXISTS setting (
-                            key VARCHAR(64) NOT NULL PRIMARY KEY,
-                            value VARCHAR(255)
+                        CREATE TABLE IF NOT EXISTS user (
+                            id INTEGER NOT NULL PRIMARY KEY,
+                            email VARCHAR(120) NOT NULL UNIQUE,
+                            password_hash VARCHAR(255) NOT NULL,
+                            created_at DATETIME NOT NULL
                         )
                     """))
-            # Re-inspect after creating tables
-            inspector = inspect(db.engine)
-            existing_tables = inspector.get_table_names()
-            print(f"Tables after explicit creation: {existing_tables}")
-            
-            # Verify user table exists
-            if "user" not in existing_tables:
-                raise RuntimeError("User table still does not exist after creation attempt!")
+                    print("User table creation SQL executed.")
+                except Exception as e:
+                    print(f"Error creating user table: {e}")
+                    raise
+            if "setting" not in existing_tables:
+                print("Creating setting table explicitly...")
+                connection.execute(text("""
+                    CREATE TABLE IF NOT EXISTS setting (
+                        key VARCHAR(64) NOT NULL PRIMARY KEY,
+                        value VARCHAR(255)
+                    )
+                """))
+        # Re-inspect after creating tables
+        inspector = inspect(db.engine)
+        existing_tables = inspector.get_table_names()
+        print(f"Tables after explicit creation: {existing_tables}")
         
+        # Verify user table exists
+        if "user" not in existing_tables:
+            raise RuntimeError("User table still does not exist after creation attempt!")
+
+
+def stored_schema_version() -> Optional[str]:
+    try:
+        return Setting.get_value(SCHEMA_VERSION_SETTING)
+    except SQLAlchemyError:
+        # Fresh database without a setting table yet
+        db.session.rollback()
+        return None
+
+
+def redacted_database_uri(uri: str) -> str:
+    """Database URI safe to log: password masked and any auth token dropped."""
+    url = make_url(uri).difference_update_query(["authToken"])
+    return url.render_as_string(hide_password=True)
+
+
+def setup_database() -> None:
+    try:
+        print(f"Database URI: {redacted_database_uri(app.config['SQLALCHEMY_DATABASE_URI'])}")
+        if stored_schema_version() == SCHEMA_VERSION:
+            print("Database schema is current; skipping table and column checks.")
+        else:
+            ensure_tables()
+            ensure_columns()
         bootstrap_cell_lines()
         bootstrap_vessels()
-        ensure_columns()
         
         # Set default settings
         if Setting.get_value(PASSAGE_WARNING_SETTING) is None:
@@ -425,68 +602,66 @@ def setup_database() -> None:
         raise
 
 
+# Stored in the setting table once ensure_tables()/ensure_columns() have run, so
+# later boots can skip schema reflection. Bump it whenever MIGRATED_COLUMNS or
+# the DDL in ensure_columns() changes.
+SCHEMA_VERSION_SETTING = "schema_version"
+SCHEMA_VERSION = "2"
+
+# Columns added after the first release, in the order they were introduced.
+# ensure_columns() adds any that are missing from an older database file.
+MIGRATED_COLUMNS: list[tuple[str, str, str]] = [
+    ("culture", "ended_on", "DATE"),
+    ("passage", "vessel_id", "INTEGER"),
+    ("passage", "vessels_used", "INTEGER"),
+    ("passage", "seeded_cells", "FLOAT"),
+    ("passage", "measured_yield_cells", "FLOAT"),
+    ("culture", "measured_cell_concentration", "FLOAT"),
+    ("culture", "measured_slurry_volume_ml", "FLOAT"),
+    ("culture", "last_handled_on", "DATE"),
+    ("culture", "pre_split_confluence_percent", "INTEGER"),
+    ("passage", "pre_split_confluence_percent", "INTEGER"),
+    ("culture", "measured_viability_percent", "INTEGER"),
+    ("passage", "measured_viability_percent", "INTEGER"),
+    ("culture", "end_reason", "TEXT"),
+    ("passage", "myco_status", "TEXT"),
+    ("passage", "myco_status_locked", "BOOLEAN DEFAULT 0"),
+]
+
+
 def ensure_columns() -> None:
     inspector = inspect(db.engine)
-    
-    def has_table(table_name: str) -> bool:
-        return table_name in inspector.get_table_names()
-    
-    def has_column(table: str, column: str) -> bool:
-        if not has_table(table):
-            return False
-        return column in {col["name"] for col in inspector.get_columns(table)}
+    table_names = set(inspector.get_table_names())
+    # Ensure User table exists
+    if "user" not in table_names:
+        db.create_all()
+        # Re-inspect after creating tables
+        inspector = inspect(db.engine)
+        table_names = set(inspector.get_table_names())
+
+    existing_columns = {
+        table: {col["name"] for col in inspector.get_columns(table)}
+        for table in ("culture", "passage")
+        if table in table_names
+    }
+    missing_ddl = [
+        f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"
+        for table, column, column_type in MIGRATED_COLUMNS
+        if table in existing_columns and column not in existing_columns[table]
+    ]
+    add_user_id = (
+        "culture" in existing_columns and "user_id" not in existing_columns["culture"]
+    )
 
     with db.engine.begin() as connection:
-        # Ensure User table exists
-        if not has_table("user"):
-            db.create_all()
-            # Re-inspect after creating tables
-            inspector = inspect(db.engine)
-        if not has_column("culture", "ended_on"):
-            connection.execute(text("ALTER TABLE culture ADD COLUMN ended_on DATE"))
-        if not has_column("passage", "vessel_id"):
-            connection.execute(text("ALTER TABLE passage ADD COLUMN vessel_id INTEGER"))
-        if not has_column("passage", "vessels_used"):
-            connection.execute(text("ALTER TABLE passage ADD COLUMN vessels_used INTEGER"))
-        if not has_column("passage", "seeded_cells"):
-            connection.execute(text("ALTER TABLE passage ADD COLUMN seeded_cells FLOAT"))
-        if not has_column("passage", "measured_yield_cells"):
+        for statement in missing_ddl:
+            connection.execute(text(statement))
+        if "passage" in table_names:
             connection.execute(
-                text("ALTER TABLE passage ADD COLUMN measured_yield_cells FLOAT")
-            )
-        if not has_column("culture", "measured_cell_concentration"):
-            connection.execute(
-                text("ALTER TABLE culture ADD COLUMN measured_cell_concentration FLOAT")
-            )
-        if not has_column("culture", "measured_slurry_volume_ml"):
-            connection.execute(
-                text("ALTER TABLE culture ADD COLUMN measured_slurry_volume_ml FLOAT")
-            )
-        if not has_column("culture", "last_handled_on"):
-            connection.execute(text("ALTER TABLE culture ADD COLUMN last_handled_on DATE"))
-        if not has_column("culture", "pre_split_confluence_percent"):
-            connection.execute(
-                text("ALTER TABLE culture ADD COLUMN pre_split_confluence_percent INTEGER")
-            )
-        if not has_column("passage", "pre_split_confluence_percent"):
-            connection.execute(
-                text("ALTER TABLE passage ADD COLUMN pre_split_confluence_percent INTEGER")
-            )
-        if not has_column("culture", "measured_viability_percent"):
-            connection.execute(
-                text("ALTER TABLE culture ADD COLUMN measured_viability_percent INTEGER")
-            )
-        if not has_column("passage", "measured_viability_percent"):
-            connection.execute(
-                text("ALTER TABLE passage ADD COLUMN measured_viability_percent INTEGER")
-            )
-        if not has_column("culture", "end_reason"):
-            connection.execute(text("ALTER TABLE culture ADD COLUMN end_reason TEXT"))
-        if not has_column("passage", "myco_status"):
-            connection.execute(text("ALTER TABLE passage ADD COLUMN myco_status TEXT"))
-        if not has_column("passage", "myco_status_locked"):
-            connection.execute(
-                text("ALTER TABLE passage ADD COLUMN myco_status_locked BOOLEAN DEFAULT 0")
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_passage_culture_num "
+                    "ON passage (culture_id, passage_number)"
+                )
             )
         connection.execute(
             text(
@@ -494,7 +669,7 @@ def ensure_columns() -> None:
             ),
             {"free": MYCO_STATUS_FREE, "tested": MYCO_STATUS_TESTED},
         )
-        if not has_column("culture", "user_id"):
+        if add_user_id:
             connection.execute(text("ALTER TABLE culture ADD COLUMN user_id INTEGER"))
             # Assign existing cultures to first user (if any exist)
             first_user = connection.execute(text("SELECT id FROM user LIMIT 1")).fetchone()
@@ -503,23 +678,78 @@ def ensure_columns() -> None:
                     text("UPDATE culture SET user_id = :user_id WHERE user_id IS NULL"),
                     {"user_id": first_user[0]}
                 )
+        if "culture" in table_names:
+            connection.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_culture_user_ended_name "
+                    "ON culture (user_id, ended_on, name)"
+                )
+            )
         connection.execute(
             text(
                 "UPDATE culture SET last_handled_on = start_date "
                 "WHERE last_handled_on IS NULL"
             )
         )
+    Setting.set_value(SCHEMA_VERSION_SETTING, SCHEMA_VERSION)
 
 
 def parse_date(value: str | None) -> date:
     if not value:
         return date.today()
     try:
-        return datetime.strptime(value, "%Y-%m-%d").date()
+        return date.fromisoformat(value)
     except ValueError:
         return date.today()
 
 
+def parse_positive_int(value: str | None) -> Optional[int]:
+    # Checked with isdecimal() rather than try/except: empty or junk form
+    # values are common and should not pay for raising an exception.
+    cleaned = (value or "").strip()
+    if not cleaned.isdecimal():
+        return None
+    number = int(cleaned)
+    return number if number > 0 else None
+
+
+def parse_percent(
+    value: str | float | int | None,
+    invalid_message: str,
+    range_message: Optional[str] = None,
+) -> tuple[Optional[int], Optional[str]]:
+    """Parse an optional whole percentage between 0 and 100.
+
+    Returns ``(percent, None)``, where ``percent`` is None for a blank field, or
+    ``(None, message)`` when the value is not a number (``invalid_message``) or
+    falls outside 0–100 (``range_message``, defaulting to ``invalid_message``).
+    """
+    if isinstance(value, str):
+        value = value.strip()
+        if not value:
+            return None, None
+        # Plain whole numbers are the common case; skip the general parser.
+        numeric = int(value) if value.isdecimal() else parse_numeric(value)
+    elif value is None:
+        return None, None
+    else:
+        numeric = parse_numeric(value)
+    if numeric is None or not math.isfinite(numeric):
+        return None, invalid_message
+    rounded = int(round(numeric))
+    if rounded < 0 or rounded > 100:
+        return None, range_message or invalid_message
+    return rounded, None
+
+
+VIABILITY_PERCENT_ERROR = "Enter viability as a percentage between 0 and 100."
+CONFLUENCE_RANGE_ERROR = "Confluency should be between 0 and 100%."
+
+
+_NUMERIC_STRIP = str.maketrans("", "", ", ")
+_NUMERIC_SUFFIXES = {"K": 1_000, "M": 1_000_000, "B": 1_000_000_000}
+
+
 def parse_numeric(value: str | float | int | None) -> Optional[float]:
     if value is None:
         return None
@@ -534,22 +764,15 @@ def parse_numeric(value: str | float | int | None) -> Optional[float]:
     cleaned = value.strip()
     if not cleaned:
         return None
-    cleaned = cleaned.replace(",", "").replace(" ", "")
-    cleaned = cleaned.upper()
+    cleaned = cleaned.translate(_NUMERIC_STRIP).upper()
+    multiplier = _NUMERIC_SUFFIXES.get(cleaned[-1:])
     try:
-        if cleaned.endswith("K"):
-            return float(cleaned[:-1]) * 1_000
-        if cleaned.endswith("M"):
-            return float(cleaned[:-1]) * 1_000_000
-        if cleaned.endswith("B"):
-            return float(cleaned[:-1]) * 1_000_000_000
+        if multiplier is not None:
+            return float(cleaned[:-1]) * multiplier
+        # float() accepts exponent forms like 300E3 directly
         return float(cleaned)
     except ValueError:
-        # allow forms like 300E3
-        try:
-            return float(cleaned.replace("E", "e"))
-        except ValueError:
-            return None
+        return None
 
 
 def parse_millions(value: str | float | int | None) -> Optional[float]:
@@ -587,16 +810,20 @@ def parse_millions(value: str | float | int | None) -> Optional[float]:
     return numeric * 1_000_000
 
 
+_CELL_COUNT_SCALES: tuple[tuple[float, str], ...] = (
+    (1_000_000_000, "B"),
+    (1_000_000, "M"),
+    (1_000, "K"),
+)
+
+
 def format_cells(value: Optional[float]) -> str:
     if value is None:
         return "—"
     absolute = abs(value)
-    if absolute >= 1_000_000_000:
-        return f"{value / 1_000_000_000:.2f} B"
-    if absolute >= 1_000_000:
-        return f"{value / 1_000_000:.2f} M"
-    if absolute >= 1_000:
-        return f"{value / 1_000:.2f} K"
+    for threshold, suffix in _CELL_COUNT_SCALES:
+        if absolute >= threshold:
+            return f"{value / threshold:.2f} {suffix}"
     return f"{value:.0f}"
 
 
@@ -635,20 +862,32 @@ def format_significant(value: Optional[float], digits: int = 2) -> Optional[str]
 
 
 def display_myco_status(value: Optional[str]) -> str:
-    lookup = {key: label for key, label in MYCO_STATUS_CHOICES}
     normalized = normalize_myco_status(value)
-    if normalized in lookup:
-        return lookup[normalized]
+    if normalized in MYCO_STATUS_LABELS:
+        return MYCO_STATUS_LABELS[normalized]
     fallback = MYCO_STATUS_DISPLAY_FALLBACK.get(normalized)
     if fallback:
         return fallback
-    return lookup[MYCO_STATUS_UNTESTED]
+    return MYCO_STATUS_LABELS[MYCO_STATUS_UNTESTED]
 
 
-app.jinja_env.filters["format_cells"] = format_cells
-app.jinja_env.filters["format_hours"] = format_hours
-app.jinja_env.filters["format_volume"] = format_volume
-app.jinja_env.filters["display_myco_status"] = display_myco_status
+def markup_filter(formatter):
+    """Wrap a formatter whose output is built only from numbers and fixed
+    labels, so Jinja can emit it without running the autoescape pass."""
+    @wraps(formatter)
+    def wrapper(value):
+        result = formatter(value)
+        if result is None:
+            return None
+        return Markup(result)
+
+    return wrapper
+
+
+app.add_template_filter(markup_filter(format_cells), "format_cells")
+app.add_template_filter(markup_filter(format_hours), "format_hours")
+app.add_template_filter(markup_filter(format_volume), "format_volume")
+app.add_template_filter(markup_filter(display_myco_status), "display_myco_status")
 
 
 def get_passage_warning_threshold() -> int:
@@ -674,42 +913,238 @@ def get_stale_cutoff_days() -> int:
 
 
 def get_label_library() -> list[str]:
-    raw = Setting.get_value(LABEL_LIBRARY_SETTING)
+    # Callers edit the returned list, so hand out a fresh copy of the cached parse
+    return list(parse_label_library(Setting.get_value(LABEL_LIBRARY_SETTING)))
+
+
+@lru_cache(maxsize=8)
+def parse_label_library(raw: Optional[str]) -> tuple[str, ...]:
+    # Keyed on the stored JSON itself, so a saved change is picked up on the
+    # next request by every worker without any invalidation.
     if not raw:
-        return DEFAULT_LABEL_LIBRARY.copy()
+        return tuple(DEFAULT_LABEL_LIBRARY)
     try:
         data = json.loads(raw)
     except (TypeError, json.JSONDecodeError):
-        return DEFAULT_LABEL_LIBRARY.copy()
+        return tuple(DEFAULT_LABEL_LIBRARY)
     if not isinstance(data, list):
-        return DEFAULT_LABEL_LIBRARY.copy()
+        return tuple(DEFAULT_LABEL_LIBRARY)
     labels: list[str] = []
     for entry in data:
         if isinstance(entry, str):
             cleaned = entry.strip()
             if cleaned:
                 labels.append(cleaned)
-    return labels
+    return tuple(labels)
 
 
 def save_label_library(labels: list[str]) -> None:
     Setting.set_value(LABEL_LIBRARY_SETTING, json.dumps(labels))
 
 
+REFERENCE_CACHE_TTL_SECONDS = 60.0
+# Bumped whenever reference rows change so every worker, not just the one that
+# made the change, drops its cached copy on the next read
+REFERENCE_CACHE_VERSION_SETTING = "reference_cache_version"
+_reference_cache: dict[str, tuple[float, Optional[str], Any]] = {}
+
+
+def cached_reference_rows(key: str, loader) -> Any:
+    """Return reference rows (vessels, cell lines) cached for a short TTL.
+
+    The rows are loaded in a throwaway session, so the cached instances are
+    detached and never shared with, or expired by, a request's own session.
+    An entry is also reloaded once the stored cache version no longer matches
+    the one it was loaded under; the check reuses the request's settings read.
+    """
+    now = time.monotonic()
+    version = Setting.get_value(REFERENCE_CACHE_VERSION_SETTING)
+    hit = _reference_cache.get(key)
+    if hit is not None and hit[1] == version and now - hit[0] < REFERENCE_CACHE_TTL_SECONDS:
+        return hit[2]
+    with Session(db.engine) as session:
+        rows = loader(session)
+    _reference_cache[key] = (now, version, rows)
+    return rows
+
+
+def invalidate_reference_cache(key: Optional[str] = None) -> None:
+    if key is None:
+        _reference_cache.clear()
+    else:
+        _reference_cache.pop(key, None)
+    Setting.set_value(REFERENCE_CACHE_VERSION_SETTING, uuid.uuid4().hex)
+
+
+def load_vessel_reference(session: Session) -> tuple[list[Vessel], Markup, Markup]:
+    """Vessel rows plus the script-safe JSON payloads built from them.
+
+    They are cached as one entry so the payloads always match the rows and
+    expire with them.
+    """
+    vessels = session.query(Vessel).order_by(Vessel.area_cm2.asc()).all()
+    vessel_payload_json = script_json(
+        [
+            {
+                "id": vessel.id,
+                "name": vessel.name,
+                "area_cm2": vessel.area_cm2,
+                "cells_at_100_confluency": vessel.cells_at_100_confluency,
+            }
+            for vessel in vessels
+        ]
+    )
+    clone_vessel_payload_json = script_json(
+        [{"id": vessel.id, "name": vessel.name, "area_cm2": vessel.area_cm2} for vessel in vessels]
+    )
+    return vessels, vessel_payload_json, clone_vessel_payload_json
+
+
+def get_vessels() -> list[Vessel]:
+    return cached_reference_rows("vessels", load_vessel_reference)[0]
+
+
+def get_cell_lines() -> list[CellLine]:
+    return cached_reference_rows(
+        "cell_lines",
+        lambda session: session.query(CellLine).order_by(CellLine.name.asc()).all(),
+    )
+
+
+def get_default_vessel_id() -> Optional[int]:
+    """ID of the smallest vessel whose name starts with "T75", if any."""
+    vessel_ids = cached_reference_rows(
+        "default_vessel_id",
+        lambda session: [
+            vessel_id
+            for (vessel_id,) in session.query(Vessel.id)
+            .filter(Vessel.name.ilike("t75%"))
+            .order_by(Vessel.area_cm2.asc())
+            .limit(1)
+        ],
+    )
+    return vessel_ids[0] if vessel_ids else None
+
+
+def get_vessel_payload_json() -> Markup:
+    """Dashboard vessel list as script-safe JSON, cached with the vessel rows."""
+    return cached_reference_rows("vessels", load_vessel_reference)[1]
+
+
+def get_clone_vessel_payload_json() -> Markup:
+    """Clone dialog vessel choices as script-safe JSON, cached with the vessel rows."""
+    return cached_reference_rows("vessels", load_vessel_reference)[2]
+
+
 def get_user_cultures_query():
     """Get a query for cultures belonging to the current user."""
     return Culture.query.filter(Culture.user_id == current_user.id)
 
 
-def get_user_culture_or_404(culture_id: int):
+def strict_loading_options(*loaders) -> tuple:
+    """Query options that make any relationship not named in ``loaders`` raise
+    on lazy load while running in debug or testing mode."""
+    if app.debug or app.testing:
+        return (*loaders, raiseload("*"))
+    return loaders
+
+
+def get_user_culture_or_404(culture_id: int, *options):
     """Get a culture by ID, ensuring it belongs to the current user."""
-    culture = get_user_cultures_query().filter(Culture.id == culture_id).first()
+    query = get_user_cultures_query()
+    if options:
+        query = query.options(*options)
+    culture = query.filter(Culture.id == culture_id).first()
     if culture is None:
-        from flask import abort
         abort(404)
     return culture
 
 
+def get_user_culture_and_vessel_or_404(
+    culture_id: int, vessel_id: Optional[int]
+) -> tuple[Culture, Optional[Vessel]]:
+    """Get an owned culture and the requested vessel in a single query.
+
+    The vessel is outer-joined on its ID, so it is None when ``vessel_id`` is
+    empty or does not match a vessel; only a missing culture aborts with 404.
+    """
+    if vessel_id is None:
+        return get_user_culture_or_404(culture_id), None
+    row = (
+        get_user_cultures_query()
+        .add_entity(Vessel)
+        .outerjoin(Vessel, Vessel.id == vessel_id)
+        .filter(Culture.id == culture_id)
+        .first()
+    )
+    if row is None:
+        abort(404)
+    return row[0], row[1]
+
+
+def get_user_passage_or_404(passage_id: int):
+    """Get a passage and its culture in one query, ensuring the current user owns it."""
+    passage = (
+        Passage.query.join(Passage.culture)
+        .options(*strict_loading_options(contains_eager(Passage.culture)))
+        .filter(Passage.id == passage_id, Culture.user_id == current_user.id)
+        .first()
+    )
+    if passage is None:
+        abort(404)
+    return passage
+
+
+def ensure_user_culture_exists(culture_id: int) -> None:
+    """Abort with 404 unless the current user owns the culture, fetching only its id."""
+    found = db.session.scalar(
+        select(Culture.id).where(Culture.id == culture_id, Culture.user_id == current_user.id)
+    )
+    if found is None:
+        abort(404)
+
+
+def update_user_culture(culture_id: int, condition, **values) -> Optional[str]:
+    """Update the current user's culture in one statement if ``condition`` holds.
+
+    Returns the culture name when a row changed and ``None`` when the condition
+    did not match. Aborts with 404 if the user has no such culture.
+    """
+    statement = (
+        update(Culture)
+        .where(Culture.id == culture_id, Culture.user_id == current_user.id, condition)
+        .values(**values)
+    )
+    if db.engine.dialect.update_returning:
+        name = db.session.execute(statement.returning(Culture.name)).scalar_one_or_none()
+    elif db.session.execute(statement).rowcount:
+        # SQLite before 3.35 has no UPDATE ... RETURNING
+        name = db.session.scalar(select(Culture.name).where(Culture.id == culture_id))
+    else:
+        name = None
+    db.session.commit()
+    if name is None:
+        ensure_user_culture_exists(culture_id)
+    return name
+
+
+def orjsonify(payload) -> Response:
+    """Serialize a JSON response body with orjson instead of the stdlib encoder."""
+    return Response(orjson.dumps(payload), mimetype="application/json")
+
+
+_SCRIPT_JSON_ESCAPES = str.maketrans({"<": "\\u003c", ">": "\\u003e", "&": "\\u0026"})
+
+
+def script_json(payload) -> Markup:
+    """Serialize a payload with orjson for an inline <script type="application/json">.
+
+    ``<``, ``>`` and ``&`` are escaped so user text such as culture names
+    cannot close the script element.
+    """
+    return Markup(orjson.dumps(payload).decode().translate(_SCRIPT_JSON_ESCAPES))
+
+
 @app.route("/login", methods=["GET", "POST"])
 def login():
     """Login route"""
@@ -726,6 +1161,11 @@ def login():
         
         user = User.query.filter_by(email=email).first()
         if user and user.check_password(password):
+            if user.password_needs_rehash():
+                # Move the stored hash to the configured cost now that the
+                # plaintext is at hand
+                user.set_password(password)
+                db.session.commit()
             login_user(user, remember=True)
             next_page = request.args.get('next')
             return redirect(next_page or url_for('index'))
@@ -828,38 +1268,39 @@ def dashboard():
 @app.route("/")
 @login_required
 def index():
+    culture_options = strict_loading_options(
+        joinedload(Culture.cell_line),
+        selectinload(Culture.passages).selectinload(Passage.vessel),
+    )
     active_cultures = (
         get_user_cultures_query()
+        .options(*culture_options)
         .filter(Culture.ended_on.is_(None))
         .order_by(Culture.name.asc())
         .all()
     )
     ended_cultures = (
         get_user_cultures_query()
+        .options(*culture_options)
         .filter(Culture.ended_on.isnot(None))
         .order_by(Culture.name.asc())
         .all()
     )
-    cell_lines = CellLine.query.order_by(CellLine.name.asc()).all()
-    vessels = Vessel.query.order_by(Vessel.area_cm2.asc()).all()
+    cell_lines = get_cell_lines()
+    vessels = get_vessels()
 
     today_value = date.today()
     passage_warning_threshold = get_passage_warning_threshold()
     stale_cutoff_days = get_stale_cutoff_days()
     label_library = get_label_library()
 
-    t75_vessel_id = None
-    for vessel in vessels:
-        if vessel.name.lower().startswith("t75"):
-            t75_vessel_id = vessel.id
-            break
+    t75_vessel_id = get_default_vessel_id()
 
     bulk_culture_payload: list[dict] = []
     prefill_active: list[dict] = []
     prefill_ended: list[dict] = []
 
-    def build_prefill_entry(culture: Culture) -> dict:
-        latest = culture.latest_passage
+    def build_prefill_entry(culture: Culture, latest: Optional[Passage]) -> dict:
         default_cell_concentration = culture.measured_cell_concentration
         if default_cell_concentration is None and latest and latest.cell_concentration:
             default_cell_concentration = latest.cell_concentration
@@ -891,6 +1332,8 @@ def index():
             "default_vessel_id": default_vessel_id,
         }
 
+    # ``latest`` is looked up once per culture and threaded through, rather than
+    # going back to the latest_passage / current_myco_status properties.
     for culture in active_cultures:
         latest = culture.latest_passage
         last_activity_date = culture.start_date
@@ -903,8 +1346,8 @@ def index():
         culture.days_since_last_passage = days_since_last_activity
         culture.is_stale = days_since_last_activity is not None and days_since_last_activity > stale_cutoff_days
         culture.passage_warning_threshold = passage_warning_threshold
-        culture.current_myco_status_value = culture.current_myco_status
-        culture.current_myco_status_label = display_myco_status(culture.current_myco_status_value)
+        culture.current_myco_status_value = normalize_myco_status(latest.myco_status if latest else None)
+        culture.current_myco_status_label = MYCO_STATUS_LABELS[culture.current_myco_status_value]
         culture.myco_status_locked = bool(latest and latest.myco_status_locked)
         default_cell_concentration = culture.measured_cell_concentration
         if default_cell_concentration is None and latest and latest.cell_concentration:
@@ -958,7 +1401,7 @@ def index():
             "latest_seeded_cells": latest_seeded_value,
             "latest_seeded_display": latest_seeded_display,
             "latest_vessels_used": latest.vessels_used if latest else None,
-            "next_passage_number": culture.next_passage_number,
+            "next_passage_number": latest.passage_number + 1 if latest else 1,
             "default_cell_concentration": default_cell_concentration,
             "default_vessel_id": default_vessel_id,
             "default_doubling_time": (
@@ -980,24 +1423,13 @@ def index():
             "last_total_area_cm2": last_total_area,
         }
         bulk_culture_payload.append(culture_payload)
-        prefill_active.append(build_prefill_entry(culture))
-
-    bulk_culture_map = {entry["id"]: entry for entry in bulk_culture_payload}
-
-    vessel_payload = [
-        {
-            "id": vessel.id,
-            "name": vessel.name,
-            "area_cm2": vessel.area_cm2,
-            "cells_at_100_confluency": vessel.cells_at_100_confluency,
-        }
-        for vessel in vessels
-    ]
+        prefill_active.append(build_prefill_entry(culture, latest))
 
     for culture in ended_cultures:
-        culture.current_myco_status_value = culture.current_myco_status
-        culture.current_myco_status_label = display_myco_status(culture.current_myco_status_value)
-        prefill_ended.append(build_prefill_entry(culture))
+        latest = culture.latest_passage
+        culture.current_myco_status_value = normalize_myco_status(latest.myco_status if latest else None)
+        culture.current_myco_status_label = MYCO_STATUS_LABELS[culture.current_myco_status_value]
+        prefill_ended.append(build_prefill_entry(culture, latest))
 
     prefill_groups: list[dict] = []
     if prefill_active:
@@ -1013,9 +1445,8 @@ def index():
         ended_cultures=ended_cultures,
         cell_lines=cell_lines,
         vessels=vessels,
-        bulk_cultures=bulk_culture_map,
-        bulk_cultures_json=json.dumps(bulk_culture_payload),
-        vessel_payload_json=json.dumps(vessel_payload),
+        bulk_cultures_json=script_json(bulk_culture_payload),
+        vessel_payload_json=get_vessel_payload_json(),
         default_vessel_id=t75_vessel_id,
         today=today_value,
         passage_warning_threshold=passage_warning_threshold,
@@ -1023,7 +1454,7 @@ def index():
         label_library=label_library,
         myco_status_choices=MYCO_STATUS_CHOICES,
         culture_prefill_groups=prefill_groups,
-        culture_prefill_json=json.dumps(prefill_payload),
+        culture_prefill_json=script_json(prefill_payload),
     )
 
 
@@ -1150,6 +1581,19 @@ def create_culture():
         if candidate is not None and candidate >= 1:
             initial_passage_number = candidate
 
+    initial_media = request.form.get("initial_media")
+    initial_cell_concentration = parse_numeric(request.form.get("initial_cell_concentration"))
+    initial_seeded_cells = parse_numeric(request.form.get("initial_seeded_cells"))
+    initial_doubling_time = parse_numeric(request.form.get("initial_doubling_time"))
+    initial_notes = request.form.get("initial_notes")
+
+    initial_viability, error = parse_percent(
+        request.form.get("initial_viability_percent"), VIABILITY_PERCENT_ERROR
+    )
+    if error:
+        flash(error, "error")
+        return redirect(url_for("index"))
+
     culture = Culture(
         name=name,
         cell_line=cell_line,
@@ -1158,30 +1602,8 @@ def create_culture():
         last_handled_on=start_date,
         notes=culture_notes,
     )
-    db.session.add(culture)
-    db.session.flush()
-
-    initial_media = request.form.get("initial_media")
-    initial_cell_concentration = parse_numeric(request.form.get("initial_cell_concentration"))
-    initial_seeded_cells = parse_numeric(request.form.get("initial_seeded_cells"))
-    initial_doubling_time = parse_numeric(request.form.get("initial_doubling_time"))
-    initial_notes = request.form.get("initial_notes")
-
-    initial_viability_raw = request.form.get("initial_viability_percent")
-    initial_viability: Optional[int] = None
-    if initial_viability_raw not in (None, ""):
-        viability_clean = initial_viability_raw.strip()
-        if viability_clean:
-            viability_numeric = parse_numeric(viability_clean)
-            if viability_numeric is None:
-                flash("Enter viability as a percentage between 0 and 100.", "error")
-                return redirect(url_for("index"))
-            viability_int = int(round(viability_numeric))
-            if viability_int < 0 or viability_int > 100:
-                flash("Enter viability as a percentage between 0 and 100.", "error")
-                return redirect(url_for("index"))
-            initial_viability = viability_int
-
+    # The relationship wires passage.culture_id, so both rows are inserted by
+    # the commit's single flush.
     passage = Passage(
         culture=culture,
         passage_number=initial_passage_number,
@@ -1196,7 +1618,7 @@ def create_culture():
         myco_status=MYCO_STATUS_UNTESTED,
         myco_status_locked=False,
     )
-    db.session.add(passage)
+    db.session.add_all((culture, passage))
 
     if initial_cell_concentration is not None:
         culture.measured_cell_concentration = initial_cell_concentration
@@ -1215,29 +1637,30 @@ def create_culture():
 @app.route("/culture/<int:culture_id>/clone", methods=["POST"])
 @login_required
 def clone_culture(culture_id: int):
-    culture = get_user_culture_or_404(culture_id)
+    payload = request.get_json(silent=True)
+    if not payload:
+        payload = request.form.to_dict(flat=True)
+
+    vessel_id_raw = payload.get("vessel_id")
+    try:
+        vessel_id = int(vessel_id_raw) if vessel_id_raw not in (None, "") else None
+    except (TypeError, ValueError):
+        vessel_id = None
+
+    culture, vessel = get_user_culture_and_vessel_or_404(culture_id, vessel_id)
     latest = culture.latest_passage
 
     if latest is None:
         return jsonify({"error": "Clone requires at least one recorded passage."}), 400
 
-    payload = request.get_json(silent=True)
-    if not payload:
-        payload = request.form.to_dict(flat=True)
-
     name = (payload.get("name") or "").strip()
     if not name:
         return jsonify({"error": "Provide a name for the cloned culture."}), 400
 
-    vessel_id_raw = payload.get("vessel_id")
     if vessel_id_raw in (None, ""):
         return jsonify({"error": "Select a vessel for the cloned culture."}), 400
-    try:
-        vessel_id = int(vessel_id_raw)
-    except (TypeError, ValueError):
+    if vessel_id is None:
         return jsonify({"error": "Select a valid vessel for the cloned culture."}), 400
-
-    vessel = Vessel.query.get(vessel_id)
     if vessel is None:
         return jsonify({"error": "The selected vessel could not be found."}), 400
 
@@ -1256,9 +1679,6 @@ def clone_culture(culture_id: int):
         last_handled_on=today_value,
         notes=culture.notes,
     )
-    db.session.add(new_culture)
-    db.session.flush()
-
     new_passage = Passage(
         culture=new_culture,
         passage_number=latest.passage_number,
@@ -1273,7 +1693,7 @@ def clone_culture(culture_id: int):
         myco_status=MYCO_STATUS_UNTESTED,
         myco_status_locked=False,
     )
-    db.session.add(new_passage)
+    db.session.add_all((new_culture, new_passage))
     db.session.commit()
 
     flash(
@@ -1293,18 +1713,20 @@ def clone_culture(culture_id: int):
 @app.route("/culture/<int:culture_id>")
 @login_required
 def view_culture(culture_id: int):
-    culture = get_user_culture_or_404(culture_id)
-    vessels = Vessel.query.order_by(Vessel.area_cm2.asc()).all()
+    culture = get_user_culture_or_404(
+        culture_id,
+        *strict_loading_options(
+            joinedload(Culture.cell_line),
+            selectinload(Culture.passages).selectinload(Passage.vessel),
+        ),
+    )
+    vessels = get_vessels()
     last_passage = culture.latest_passage
     default_cell_concentration = (
         culture.measured_cell_concentration
         or (last_passage.cell_concentration if last_passage and last_passage.cell_concentration else 1e6)
     )
-    default_vessel_id = None
-    for vessel in vessels:
-        if vessel.name.lower().startswith("t75"):
-            default_vessel_id = vessel.id
-            break
+    default_vessel_id = get_default_vessel_id()
 
     default_measured_yield_millions = None
     if culture.measured_cells_total:
@@ -1334,13 +1756,11 @@ def view_culture(culture_id: int):
     if last_passage and last_passage.vessel and last_passage.vessel.area_cm2:
         vessels_used = last_passage.vessels_used or 1
         last_total_area = last_passage.vessel.area_cm2 * vessels_used
-    clone_vessel_payload = [
-        {"id": vessel.id, "name": vessel.name, "area_cm2": vessel.area_cm2}
-        for vessel in vessels
-    ]
 
-    culture.current_myco_status_value = culture.current_myco_status
-    culture.current_myco_status_label = display_myco_status(culture.current_myco_status_value)
+    culture.current_myco_status_value = normalize_myco_status(
+        last_passage.myco_status if last_passage else None
+    )
+    culture.current_myco_status_label = MYCO_STATUS_LABELS[culture.current_myco_status_value]
     culture.myco_status_locked = bool(last_passage and last_passage.myco_status_locked)
 
     return render_template(
@@ -1354,9 +1774,8 @@ def view_culture(culture_id: int):
         default_measured_yield_millions=default_measured_yield_millions,
         default_pre_split_confluence=culture.pre_split_confluence_percent,
         default_viability_percent=default_viability,
-        today=date.today(),
         myco_status_choices=MYCO_STATUS_CHOICES,
-        clone_vessel_payload=clone_vessel_payload,
+        clone_vessel_payload_json=get_clone_vessel_payload_json(),
         clone_default_vessel_id=clone_default_vessel_id,
         clone_default_seeded=clone_default_seeded,
         last_total_area=last_total_area,
@@ -1366,7 +1785,9 @@ def view_culture(culture_id: int):
 @app.route("/culture/<int:culture_id>/add_passage", methods=["POST"])
 @login_required
 def add_passage(culture_id: int):
-    culture = get_user_culture_or_404(culture_id)
+    culture, vessel = get_user_culture_and_vessel_or_404(
+        culture_id, parse_positive_int(request.form.get("vessel_id"))
+    )
 
     if culture.ended_on is not None:
         flash(
@@ -1385,17 +1806,6 @@ def add_passage(culture_id: int):
     if request.form.get("use_previous_media") and last_passage:
         media = last_passage.media
 
-    vessel_id = None
-    vessel = None
-    vessel_id_raw = request.form.get("vessel_id")
-    if vessel_id_raw:
-        try:
-            vessel_id = int(vessel_id_raw)
-        except (TypeError, ValueError):
-            vessel_id = None
-    if vessel_id:
-        vessel = Vessel.query.get(vessel_id)
-
     vessels_used_raw = request.form.get("vessels_used")
     vessels_used = None
     if vessels_used_raw:
@@ -1408,34 +1818,20 @@ def add_passage(culture_id: int):
 
     seeded_cells = parse_numeric(request.form.get("seeded_cells"))
     measured_yield_cells = parse_millions(request.form.get("measured_yield_millions"))
-    viability_raw = request.form.get("measured_viability_percent")
-    measured_viability: Optional[int] = None
-    if viability_raw not in (None, ""):
-        viability_clean = viability_raw.strip()
-        if viability_clean:
-            viability_numeric = parse_numeric(viability_clean)
-            if viability_numeric is None:
-                flash("Enter viability as a percentage between 0 and 100.", "error")
-                return redirect(url_for("view_culture", culture_id=culture.id))
-            viability_int = int(round(viability_numeric))
-            if viability_int < 0 or viability_int > 100:
-                flash("Enter viability as a percentage between 0 and 100.", "error")
-                return redirect(url_for("view_culture", culture_id=culture.id))
-            measured_viability = viability_int
-    pre_split_confluence = request.form.get("pre_split_confluence_percent")
-    pre_split_value: Optional[int] = None
-    if pre_split_confluence not in (None, ""):
-        cleaned = pre_split_confluence.strip()
-        if cleaned:
-            numeric = parse_numeric(cleaned)
-            if numeric is None:
-                flash("Enter a valid pre-split confluency between 0 and 100%.", "error")
-                return redirect(url_for("view_culture", culture_id=culture.id))
-            rounded = int(round(numeric))
-            if rounded < 0 or rounded > 100:
-                flash("Confluency should be between 0 and 100%.", "error")
-                return redirect(url_for("view_culture", culture_id=culture.id))
-            pre_split_value = rounded
+    measured_viability, error = parse_percent(
+        request.form.get("measured_viability_percent"), VIABILITY_PERCENT_ERROR
+    )
+    if error:
+        flash(error, "error")
+        return redirect(url_for("view_culture", culture_id=culture.id))
+    pre_split_value, error = parse_percent(
+        request.form.get("pre_split_confluence_percent"),
+        "Enter a valid pre-split confluency between 0 and 100%.",
+        CONFLUENCE_RANGE_ERROR,
+    )
+    if error:
+        flash(error, "error")
+        return redirect(url_for("view_culture", culture_id=culture.id))
 
     pre_split_for_new = None
     measured_yield_for_new = None
@@ -1458,8 +1854,7 @@ def add_passage(culture_id: int):
             viability_for_new = measured_viability
 
     myco_status = request.form.get("myco_status")
-    valid_statuses = {choice[0] for choice in MYCO_STATUS_CHOICES}
-    if not myco_status or myco_status not in valid_statuses:
+    if not myco_status or myco_status not in MYCO_STATUS_VALUES:
         myco_status = MYCO_STATUS_UNTESTED
     else:
         myco_status = normalize_myco_status(myco_status)
@@ -1513,20 +1908,12 @@ def record_measurement(culture_id: int):
 
     concentration = parse_numeric(request.form.get("measured_cell_concentration"))
     volume_ml = parse_numeric(request.form.get("measured_slurry_volume_ml"))
-    viability_raw = request.form.get("measured_viability_percent")
-    viability_value: Optional[int] = None
-    if viability_raw not in (None, ""):
-        viability_clean = viability_raw.strip()
-        if viability_clean:
-            viability_numeric = parse_numeric(viability_clean)
-            if viability_numeric is None:
-                flash("Enter viability as a percentage between 0 and 100.", "error")
-                return redirect(url_for("view_culture", culture_id=culture.id))
-            viability_int = int(round(viability_numeric))
-            if viability_int < 0 or viability_int > 100:
-                flash("Enter viability as a percentage between 0 and 100.", "error")
-                return redirect(url_for("view_culture", culture_id=culture.id))
-            viability_value = viability_int
+    viability_value, error = parse_percent(
+        request.form.get("measured_viability_percent"), VIABILITY_PERCENT_ERROR
+    )
+    if error:
+        flash(error, "error")
+        return redirect(url_for("view_culture", culture_id=culture.id))
 
     culture.measured_cell_concentration = concentration
     culture.measured_slurry_volume_ml = volume_ml
@@ -1589,24 +1976,15 @@ def record_confluence(culture_id: int):
         flash(f"Cleared confluence entry for '{culture.name}'.", "info")
         return redirect(url_for("view_culture", culture_id=culture.id))
 
-    raw_value = request.form.get("pre_split_confluence_percent")
-    if raw_value in (None, ""):
-        flash("Enter a confluency percentage before saving.", "error")
-        return redirect(url_for("view_culture", culture_id=culture.id))
-
-    cleaned = raw_value.strip()
-    if not cleaned:
-        flash("Enter a confluency percentage before saving.", "error")
-        return redirect(url_for("view_culture", culture_id=culture.id))
-
-    numeric = parse_numeric(cleaned)
-    if numeric is None:
-        flash("Enter a valid confluency percentage (0–100).", "error")
-        return redirect(url_for("view_culture", culture_id=culture.id))
-
-    rounded = int(round(numeric))
-    if rounded < 0 or rounded > 100:
-        flash("Confluency should be between 0 and 100%.", "error")
+    rounded, error = parse_percent(
+        request.form.get("pre_split_confluence_percent"),
+        "Enter a valid confluency percentage (0–100).",
+        CONFLUENCE_RANGE_ERROR,
+    )
+    if error is None and rounded is None:
+        error = "Enter a confluency percentage before saving."
+    if error:
+        flash(error, "error")
         return redirect(url_for("view_culture", culture_id=culture.id))
 
     culture.pre_split_confluence_percent = rounded
@@ -1647,6 +2025,7 @@ def create_cell_line():
     )
     db.session.add(cell_line)
     db.session.commit()
+    invalidate_reference_cache("cell_lines")
 
     flash(f"Added cell line '{cell_line.name}'.", "success")
     return redirect(url_for("index"))
@@ -1666,13 +2045,18 @@ def doubling_times():
         }
         for cell_line in cell_lines
     ]
-    return jsonify(payload)
+    return orjsonify(payload)
 
 
 @app.route("/api/calc-seeding", methods=["POST"])
 @login_required
 def calculate_seeding():
-    payload = request.get_json(force=True)
+    try:
+        payload = orjson.loads(request.get_data(cache=False))
+    except orjson.JSONDecodeError:
+        payload = None
+    if not isinstance(payload, dict):
+        return orjsonify({"error": "Invalid request"}), 400
 
     mode = payload.get("mode", "confluency")
     cell_concentration_raw = payload.get("cell_concentration")
@@ -1680,7 +2064,7 @@ def calculate_seeding():
     cell_concentration = parse_numeric(cell_concentration_raw)
 
     if cell_concentration is None or cell_concentration <= 0:
-        return jsonify(
+        return orjsonify(
             {"error": "Provide a valid starting cell concentration (e.g. 1e6 cells/mL)."}
         ), 400
 
@@ -1689,7 +2073,7 @@ def calculate_seeding():
 
         total_volume_ml = parse_numeric(payload.get("total_volume_ml"))
         if total_volume_ml is None or total_volume_ml <= 0:
-            return jsonify({"error": "Total volume must be greater than zero."}), 400
+            return orjsonify({"error": "Total volume must be greater than zero."}), 400
 
         final_concentration = None
         cells_to_seed = None
@@ -1700,15 +2084,15 @@ def calculate_seeding():
             volume_per_seed_ml = parse_numeric(payload.get("volume_per_seed_ml"))
 
             if cells_to_seed is None or cells_to_seed <= 0:
-                return jsonify({"error": "Number of cells to seed must be greater than zero."}), 400
+                return orjsonify({"error": "Number of cells to seed must be greater than zero."}), 400
             if volume_per_seed_ml is None or volume_per_seed_ml <= 0:
-                return jsonify({"error": "Volume for seeding must be greater than zero."}), 400
+                return orjsonify({"error": "Volume for seeding must be greater than zero."}), 400
 
             final_concentration = cells_to_seed / volume_per_seed_ml
         else:
             final_concentration = parse_numeric(payload.get("final_concentration"))
             if final_concentration is None or final_concentration <= 0:
-                return jsonify({"error": "Final concentration must be greater than zero."}), 400
+                return orjsonify({"error": "Final concentration must be greater than zero."}), 400
             input_mode = "concentration"
 
         cells_needed = final_concentration * total_volume_ml
@@ -1716,7 +2100,7 @@ def calculate_seeding():
 
         if slurry_volume_ml > total_volume_ml:
             return (
-                jsonify(
+                orjsonify(
                     {
                         "error": "Target concentration is higher than the starting suspension. "
                         "Use a more concentrated source or reduce the final volume.",
@@ -1772,7 +2156,7 @@ def calculate_seeding():
         if portions_prepared is not None:
             response["portions_prepared"] = portions_prepared
 
-        return jsonify(response)
+        return orjsonify(response)
 
     vessel_id_raw = payload.get("vessel_id")
     target_confluency = payload.get("target_confluency", 0)
@@ -1783,27 +2167,27 @@ def calculate_seeding():
     try:
         vessel_id = int(vessel_id_raw)
     except (TypeError, ValueError):
-        return jsonify({"error": "Invalid vessel selection."}), 400
+        return orjsonify({"error": "Invalid vessel selection."}), 400
 
     vessel = Vessel.query.get(vessel_id)
     if vessel is None:
-        return jsonify({"error": "Vessel not found."}), 404
+        return orjsonify({"error": "Vessel not found."}), 404
 
     try:
         confluency_fraction = max(0.0, min(float(target_confluency), 100.0)) / 100.0
     except (TypeError, ValueError):
-        return jsonify({"error": "Invalid confluency percentage."}), 400
+        return orjsonify({"error": "Invalid confluency percentage."}), 400
 
     if confluency_fraction <= 0:
-        return jsonify({"error": "Target confluency must be greater than zero."}), 400
+        return orjsonify({"error": "Target confluency must be greater than zero."}), 400
 
     try:
         hours = float(target_hours)
     except (TypeError, ValueError):
-        return jsonify({"error": "Invalid time horizon."}), 400
+        return orjsonify({"error": "Invalid time horizon."}), 400
 
     if hours <= 0:
-        return jsonify({"error": "Time horizon must be greater than zero."}), 400
+        return orjsonify({"error": "Time horizon must be greater than zero."}), 400
 
     try:
         vessel_count = int(vessel_count_raw)
@@ -1828,14 +2212,13 @@ def calculate_seeding():
         doubling_time = cell_line.average_doubling_time
 
     if doubling_time is None or doubling_time <= 0:
-        return jsonify({"error": "A valid doubling time is required."}), 400
+        return orjsonify({"error": "A valid doubling time is required."}), 400
 
     final_cells_per_vessel = vessel.cells_at_100_confluency * confluency_fraction
     final_cells_total = final_cells_per_vessel * vessel_count
     growth_cycles = hours / doubling_time
-    growth_factor = math.pow(2, growth_cycles)
-    if growth_factor <= 0:
-        return jsonify({"error": "Could not compute growth factor."}), 400
+    # hours and doubling_time are both positive, so growth_factor is >= 1
+    growth_factor = 2.0 ** growth_cycles
 
     required_cells_per_vessel = final_cells_per_vessel / growth_factor
     required_cells_total = required_cells_per_vessel * vessel_count
@@ -1874,7 +2257,7 @@ def calculate_seeding():
         "vessels_used": vessel_count,
         "note_suggestion": note_suggestion,
     }
-    return jsonify(response)
+    return orjsonify(response)
 
 
 @app.route("/api/bulk-harvest", methods=["POST"])
@@ -1907,77 +2290,22 @@ def record_bulk_harvest():
 
         measured_concentration = parse_numeric(entry.get("measured_cell_concentration"))
         measured_volume = parse_numeric(entry.get("measured_slurry_volume_ml"))
-        viability_raw = entry.get("measured_viability_percent")
-        viability_value: Optional[int] = None
-        if viability_raw not in (None, ""):
-            if isinstance(viability_raw, str):
-                viability_candidate = viability_raw.strip()
-            else:
-                viability_candidate = viability_raw
-            if viability_candidate not in (None, ""):
-                viability_numeric = parse_numeric(viability_candidate)
-                if viability_numeric is None:
-                    db.session.rollback()
-                    return (
-                        jsonify(
-                            {
-                                "error": (
-                                    f"Enter viability between 0 and 100% for culture '{culture.name}'."
-                                )
-                            }
-                        ),
-                        400,
-                    )
-                viability_int = int(round(viability_numeric))
-                if viability_int < 0 or viability_int > 100:
-                    db.session.rollback()
-                    return (
-                        jsonify(
-                            {
-                                "error": (
-                                    f"Enter viability between 0 and 100% for culture '{culture.name}'."
-                                )
-                            }
-                        ),
-                        400,
-                    )
-                viability_value = viability_int
-        pre_split_value: Optional[int] = None
+        viability_value, error = parse_percent(
+            entry.get("measured_viability_percent"),
+            f"Enter viability between 0 and 100% for culture '{culture.name}'.",
+        )
+        if error:
+            db.session.rollback()
+            return jsonify({"error": error}), 400
 
-        pre_split_raw = entry.get("pre_split_confluence_percent")
-        if isinstance(pre_split_raw, str):
-            pre_split_candidate = pre_split_raw.strip()
-        else:
-            pre_split_candidate = pre_split_raw
-        if pre_split_candidate not in (None, ""):
-            numeric = parse_numeric(pre_split_candidate)
-            if numeric is None:
-                db.session.rollback()
-                return (
-                    jsonify(
-                        {
-                            "error": (
-                                f"Enter a valid pre-split confluency for culture '{culture.name}'."
-                            )
-                        }
-                    ),
-                    400,
-                )
-            rounded = int(round(numeric))
-            if rounded < 0 or rounded > 100:
-                db.session.rollback()
-                return (
-                    jsonify(
-                        {
-                            "error": (
-                                "Confluency should be between 0 and 100% for "
-                                f"culture '{culture.name}'."
-                            )
-                        }
-                    ),
-                    400,
-                )
-            pre_split_value = rounded
+        pre_split_value, error = parse_percent(
+            entry.get("pre_split_confluence_percent"),
+            f"Enter a valid pre-split confluency for culture '{culture.name}'.",
+            f"Confluency should be between 0 and 100% for culture '{culture.name}'.",
+        )
+        if error:
+            db.session.rollback()
+            return jsonify({"error": error}), 400
 
         if measured_concentration is None or measured_concentration <= 0:
             db.session.rollback()
@@ -2076,36 +2404,21 @@ def create_bulk_passages():
         doubling_time = parse_numeric(entry.get("doubling_time_hours"))
         seeded_cells = parse_numeric(entry.get("seeded_cells"))
         measured_yield_cells = parse_millions(entry.get("measured_yield_millions"))
-        viability_raw = entry.get("measured_viability_percent")
-        measured_viability: Optional[int] = None
-        if viability_raw not in (None, ""):
-            if isinstance(viability_raw, str):
-                viability_raw = viability_raw.strip()
-            if viability_raw not in (None, ""):
-                viability_numeric = parse_numeric(viability_raw)
-                if viability_numeric is None:
-                    db.session.rollback()
-                    return jsonify({"error": "Enter viability as a percentage between 0 and 100."}), 400
-                viability_int = int(round(viability_numeric))
-                if viability_int < 0 or viability_int > 100:
-                    db.session.rollback()
-                    return jsonify({"error": "Enter viability as a percentage between 0 and 100."}), 400
-                measured_viability = viability_int
-        pre_split_confluence_value = None
-        pre_split_raw = entry.get("pre_split_confluence_percent")
-        if isinstance(pre_split_raw, str):
-            pre_split_raw = pre_split_raw.strip()
-        if pre_split_raw not in (None, ""):
-            numeric = parse_numeric(pre_split_raw)
-            if numeric is None:
-                db.session.rollback()
-                return jsonify({"error": "Enter a valid confluency percentage."}), 400
-            rounded = int(round(numeric))
-            if rounded < 0 or rounded > 100:
-                db.session.rollback()
-                return jsonify({"error": "Confluency should be between 0 and 100%."}), 400
-            pre_split_confluence_value = rounded
-        elif culture.pre_split_confluence_percent is not None:
+        measured_viability, error = parse_percent(
+            entry.get("measured_viability_percent"), VIABILITY_PERCENT_ERROR
+        )
+        if error:
+            db.session.rollback()
+            return jsonify({"error": error}), 400
+        pre_split_confluence_value, error = parse_percent(
+            entry.get("pre_split_confluence_percent"),
+            "Enter a valid confluency percentage.",
+            CONFLUENCE_RANGE_ERROR,
+        )
+        if error:
+            db.session.rollback()
+            return jsonify({"error": error}), 400
+        if pre_split_confluence_value is None:
             pre_split_confluence_value = culture.pre_split_confluence_percent
 
         if entry.get("use_previous_media") and last_passage:
@@ -2182,8 +2495,7 @@ def create_bulk_passages():
                 viability_for_new = measured_viability
 
         myco_status_value = entry.get("myco_status")
-        valid_statuses = {choice[0] for choice in MYCO_STATUS_CHOICES}
-        if myco_status_value not in valid_statuses:
+        if myco_status_value not in MYCO_STATUS_VALUES:
             myco_status_value = MYCO_STATUS_UNTESTED
         else:
             myco_status_value = normalize_myco_status(myco_status_value)
@@ -2241,6 +2553,95 @@ def create_bulk_passages():
     return jsonify({"success": True, "created": len(created_passages), "passages": created_passages})
 
 
+CULTURE_EXPORT_HEADER = [
+    "Culture name",
+    "Cell line",
+    "Status",
+    "Start date",
+    "Ended on",
+    "Current passage",
+    "Current passage date",
+    "Media",
+    "Cell concentration (cells/mL)",
+    "Doubling time (hours)",
+    "Vessel usage",
+    "Pre-split confluence (%)",
+    "Seeded cells",
+    "Measured yield (cells)",
+    "Measured viability (%)",
+    "Myco status",
+    "End reason",
+]
+
+
+def culture_export_row(culture: Culture) -> list[str]:
+    """Build one CSV export row, reading each latest-passage attribute once."""
+    latest = culture.latest_passage
+    if latest is None:
+        return [
+            culture.name,
+            culture.cell_line.name,
+            "Active" if culture.ended_on is None else "Ended",
+            culture.start_date.strftime("%Y-%m-%d"),
+            culture.ended_on.strftime("%Y-%m-%d") if culture.ended_on else "",
+            "—",
+            "—",
+            "",
+            "",
+            "",
+            "",
+            "",
+            "",
+            "",
+            "",
+            display_myco_status(None),
+            culture.end_reason or "",
+        ]
+
+    vessel = latest.vessel
+    cell_concentration = latest.cell_concentration
+    doubling_time = latest.doubling_time_hours
+    seeded_cells = latest.seeded_cells
+    measured_yield = latest.measured_yield_cells
+    confluence = latest.pre_split_confluence_percent
+    viability = latest.measured_viability_percent
+
+    vessel_info = ""
+    if vessel:
+        count = latest.vessels_used or 1
+        vessel_info = f"{count} x {vessel.name}"
+        if vessel.area_cm2:
+            vessel_info += f" ({vessel.area_cm2:g} cm^2)"
+
+    seeded_cells_value = ""
+    if seeded_cells is not None:
+        seeded_cells_value = format_significant(seeded_cells, 2) or ""
+
+    measured_yield_display = ""
+    if measured_yield is not None:
+        measured_yield_display = format_significant(measured_yield, 2) or ""
+
+    return [
+        culture.name,
+        culture.cell_line.name,
+        "Active" if culture.ended_on is None else "Ended",
+        culture.start_date.strftime("%Y-%m-%d"),
+        culture.ended_on.strftime("%Y-%m-%d") if culture.ended_on else "",
+        f"P{latest.passage_number}",
+        latest.date.strftime("%Y-%m-%d"),
+        latest.media or "",
+        f"{cell_concentration:g}" if cell_concentration else "",
+        f"{doubling_time:g}" if doubling_time else "",
+        vessel_info,
+        f"{confluence}" if confluence is not None else "",
+        seeded_cells_value,
+        measured_yield_display,
+        f"{viability}" if viability is not None else "",
+        display_myco_status(latest.myco_status),
+        culture.end_reason or "",
+    ]
+
+
 @app.route("/export/cultures.csv")
 @login_required
 def export_cultures():
@@ -2248,98 +2649,38 @@ def export_cultures():
     if status not in {"active", "ended", "both", "all"}:
         return jsonify({"error": "Invalid export status."}), 400
 
-    query = get_user_cultures_query()
+    query = get_user_cultures_query().options(
+        selectinload(Culture.cell_line),
+        selectinload(Culture.passages).selectinload(Passage.vessel),
+    )
     if status == "active":
         query = query.filter(Culture.ended_on.is_(None))
     elif status == "ended":
         query = query.filter(Culture.ended_on.isnot(None))
 
-    cultures = query.order_by(Culture.name.asc()).all()
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(
-        [
-            "Culture name",
-            "Cell line",
-            "Status",
-            "Start date",
-            "Ended on",
-            "Current passage",
-            "Current passage date",
-            "Media",
-            "Cell concentration (cells/mL)",
-            "Doubling time (hours)",
-            "Vessel usage",
-            "Pre-split confluence (%)",
-            "Seeded cells",
-            "Measured yield (cells)",
-            "Measured viability (%)",
-            "Myco status",
-            "End reason",
-        ]
-    )
-    for culture in cultures:
-        latest = culture.latest_passage
-        vessel_info = ""
-        if latest and latest.vessel:
-            count = latest.vessels_used or 1
-            vessel_info = f"{count} x {latest.vessel.name}"
-            if latest.vessel.area_cm2:
-                vessel_info += f" ({latest.vessel.area_cm2:g} cm^2)"
-
-        seeded_cells_value = ""
-        if latest and latest.seeded_cells is not None:
-            formatted_seeded = format_significant(latest.seeded_cells, 2)
-            if formatted_seeded is not None:
-                seeded_cells_value = formatted_seeded
-
-        confluence_display = ""
-        if latest and latest.pre_split_confluence_percent is not None:
-            confluence_display = f"{latest.pre_split_confluence_percent}"
-
-        measured_yield_display = ""
-        if latest and latest.measured_yield_cells is not None:
-            formatted_yield = format_significant(latest.measured_yield_cells, 2)
-            if formatted_yield is not None:
-                measured_yield_display = formatted_yield
-
-        viability_display = ""
-        if latest and latest.measured_viability_percent is not None:
-            viability_display = f"{latest.measured_viability_percent}"
+    # Fetched in batches while the response streams rather than all up front.
+    cultures = query.order_by(Culture.name.asc()).yield_per(500)
+
+    def generate_rows():
+        # Reuse one small buffer and hand each encoded row to the WSGI server
+        # as soon as it is formatted, instead of building the whole file first.
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(CULTURE_EXPORT_HEADER)
+        yield output.getvalue()
+        for culture in cultures:
+            output.seek(0)
+            output.truncate()
+            writer.writerow(culture_export_row(culture))
+            yield output.getvalue()
 
-        myco_display = display_myco_status(latest.myco_status) if latest else display_myco_status(None)
-
-        writer.writerow(
-            [
-                culture.name,
-                culture.cell_line.name,
-                "Active" if culture.ended_on is None else "Ended",
-                culture.start_date.strftime("%Y-%m-%d"),
-                culture.ended_on.strftime("%Y-%m-%d") if culture.ended_on else "",
-                f"P{latest.passage_number}" if latest else "—",
-                latest.date.strftime("%Y-%m-%d") if latest else "—",
-                latest.media if latest and latest.media else "",
-                f"{latest.cell_concentration:g}" if latest and latest.cell_concentration else "",
-                f"{latest.doubling_time_hours:g}" if latest and latest.doubling_time_hours else "",
-                vessel_info,
-                confluence_display,
-                seeded_cells_value,
-                measured_yield_display,
-                viability_display,
-                myco_display,
-                culture.end_reason or "",
-            ]
-        )
-
-    output.seek(0)
     if status in {"both", "all"}:
         status_slug = "all"
     else:
         status_slug = status
     filename = f"{status_slug}_cultures_{date.today().strftime('%Y%m%d')}.csv"
     return Response(
-        output.getvalue(),
+        stream_with_context(generate_rows()),
         mimetype="text/csv",
         headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
@@ -2403,10 +2744,20 @@ def import_database():
     try:
         uploaded_file.save(temp_path)
         db.session.remove()
+        # Fold the write-ahead log into the main file so the backup copy is
+        # complete and no stale -wal file outlives the swap
+        with db.engine.connect() as connection:
+            connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+        # Close every pooled connection before the swap so none of them can
+        # write old pages into the replaced file
         db.engine.dispose()
         if target_path.exists():
             shutil.copy2(target_path, backup_path)
         shutil.move(temp_path, target_path)
+        # Leftover -wal/-shm files belong to the old database; SQLite would
+        # replay their frames on top of the imported file
+        for suffix in ("-wal", "-shm"):
+            target_path.with_name(target_path.name + suffix).unlink(missing_ok=True)
         
         # Reconnect to the new database
         db.engine.dispose()
@@ -2479,6 +2830,7 @@ def import_database():
         
         # Re-initialize database connection
         db.engine.dispose()
+        invalidate_reference_cache()
         
     except Exception as exc:
         if temp_path.exists():
@@ -2508,35 +2860,35 @@ def export_active_cultures_legacy():
 @app.route("/culture/<int:culture_id>/end", methods=["POST"])
 @login_required
 def end_culture(culture_id: int):
-    culture = get_user_culture_or_404(culture_id)
-    if culture.ended_on is not None:
-        flash("Culture is already marked as ended.", "info")
-        return redirect(url_for("view_culture", culture_id=culture.id))
-
     ended_on = parse_date(request.form.get("ended_on"))
     reason_raw = request.form.get("end_reason") or ""
-    culture.ended_on = ended_on
-    culture.end_reason = reason_raw.strip() or None
-    db.session.commit()
-
-    flash(f"Culture '{culture.name}' marked as ended.", "success")
-    return redirect(url_for("view_culture", culture_id=culture.id))
+    name = update_user_culture(
+        culture_id,
+        Culture.ended_on.is_(None),
+        ended_on=ended_on,
+        end_reason=reason_raw.strip() or None,
+    )
+    if name is None:
+        flash("Culture is already marked as ended.", "info")
+    else:
+        flash(f"Culture '{name}' marked as ended.", "success")
+    return redirect(url_for("view_culture", culture_id=culture_id))
 
 
 @app.route("/culture/<int:culture_id>/reactivate", methods=["POST"])
 @login_required
 def reactivate_culture(culture_id: int):
-    culture = get_user_culture_or_404(culture_id)
-    if culture.ended_on is None:
+    name = update_user_culture(
+        culture_id,
+        Culture.ended_on.is_not(None),
+        ended_on=None,
+        end_reason=None,
+    )
+    if name is None:
         flash("Culture is already active.", "info")
-        return redirect(url_for("view_culture", culture_id=culture.id))
-
-    culture.ended_on = None
-    culture.end_reason = None
-    db.session.commit()
-
-    flash(f"Culture '{culture.name}' reactivated.", "success")
-    return redirect(url_for("view_culture", culture_id=culture.id))
+    else:
+        flash(f"Culture '{name}' reactivated.", "success")
+    return redirect(url_for("view_culture", culture_id=culture_id))
 
 
 @app.route("/culture/<int:culture_id>/refresh_media", methods=["POST"])
@@ -2575,9 +2927,8 @@ def refresh_media(culture_id: int):
 def update_myco_status(culture_id: int):
     culture = get_user_culture_or_404(culture_id)
     status = request.form.get("myco_status") or ""
-    valid_statuses = {choice[0] for choice in MYCO_STATUS_CHOICES}
 
-    if status not in valid_statuses:
+    if status not in MYCO_STATUS_VALUES:
         db.session.rollback()
         flash("Select a valid Myco status before saving.", "error")
     else:
@@ -2606,83 +2957,83 @@ def update_myco_status(culture_id: int):
 @app.route("/culture/<int:culture_id>/delete", methods=["POST"])
 @login_required
 def delete_culture(culture_id: int):
-    culture = get_user_culture_or_404(culture_id)
+    # Only ended cultures owned by the current user may be deleted. Passages are
+    # removed explicitly because SQLite does not enforce ON DELETE CASCADE
+    # unless foreign keys are switched on, and older tables predate it anyway.
+    deletable = select(Culture.id).where(
+        Culture.id == culture_id,
+        Culture.user_id == current_user.id,
+        Culture.ended_on.is_not(None),
+    )
+    delete_passages = delete(Passage).where(Passage.culture_id.in_(deletable))
+    delete_culture_row = delete(Culture).where(Culture.id.in_(deletable))
+    options = {"synchronize_session": False}
+    if db.engine.dialect.delete_returning:
+        db.session.execute(delete_passages, execution_options=options)
+        name = db.session.execute(
+            delete_culture_row.returning(Culture.name), execution_options=options
+        ).scalar_one_or_none()
+    else:
+        # SQLite before 3.35 has no DELETE ... RETURNING, so read the name first
+        name = db.session.scalar(select(Culture.name).where(Culture.id.in_(deletable)))
+        if name is not None:
+            db.session.execute(delete_passages, execution_options=options)
+            db.session.execute(delete_culture_row, execution_options=options)
+    db.session.commit()
 
-    if culture.ended_on is None:
+    if name is None:
+        ensure_user_culture_exists(culture_id)
         flash("End the culture before deleting it permanently.", "error")
-        return redirect(url_for("view_culture", culture_id=culture.id))
-
-    name = culture.name
-    db.session.delete(culture)
-    db.session.commit()
+        return redirect(url_for("view_culture", culture_id=culture_id))
 
     flash(f"Culture '{name}' permanently deleted.", "success")
     return redirect(url_for("index"))
 
 
+# (attribute, form field, parser) for the passage fields edited as-is; a parser
+# of None stores the raw form value.
+PASSAGE_EDIT_FIELDS = (
+    ("date", "date", parse_date),
+    ("media", "media", None),
+    ("cell_concentration", "cell_concentration", parse_numeric),
+    ("doubling_time_hours", "doubling_time_hours", parse_numeric),
+    ("notes", "notes", None),
+    ("seeded_cells", "seeded_cells", parse_numeric),
+    ("measured_yield_cells", "measured_yield_millions", parse_millions),
+)
+
+
 @app.route("/passage/<int:passage_id>/edit", methods=["GET", "POST"])
 @login_required
 def edit_passage(passage_id: int):
-    passage = Passage.query.get_or_404(passage_id)
-    culture = get_user_culture_or_404(passage.culture_id)
+    passage = get_user_passage_or_404(passage_id)
+    culture = passage.culture
     if request.method == "POST":
-        passage.date = parse_date(request.form.get("date"))
-        passage.media = request.form.get("media")
-        passage.cell_concentration = parse_numeric(
-            request.form.get("cell_concentration")
-        )
-        passage.doubling_time_hours = parse_numeric(
-            request.form.get("doubling_time_hours")
-        )
-        passage.notes = request.form.get("notes")
-
-        vessel_id = None
-        vessel_id_raw = request.form.get("vessel_id")
-        if vessel_id_raw:
-            try:
-                vessel_id = int(vessel_id_raw)
-            except (TypeError, ValueError):
-                vessel_id = None
-        passage.vessel = Vessel.query.get(vessel_id) if vessel_id else None
+        form = request.form
+        for attribute, field, parser in PASSAGE_EDIT_FIELDS:
+            value = form.get(field)
+            setattr(passage, attribute, parser(value) if parser else value)
+
+        # Validate against the cached vessel list rather than loading the row;
+        # unknown ids clear the vessel as before.
+        vessel_id = parse_positive_int(form.get("vessel_id"))
+        if vessel_id is not None and all(vessel.id != vessel_id for vessel in get_vessels()):
+            vessel_id = None
+        passage.vessel_id = vessel_id
+        passage.vessels_used = parse_positive_int(form.get("vessels_used"))
 
-        vessels_used_raw = request.form.get("vessels_used")
-        vessels_used = None
-        if vessels_used_raw:
-            try:
-                candidate = int(vessels_used_raw)
-            except (TypeError, ValueError):
-                candidate = None
-            if candidate and candidate > 0:
-                vessels_used = candidate
-        passage.vessels_used = vessels_used
-
-        passage.seeded_cells = parse_numeric(request.form.get("seeded_cells"))
-        passage.measured_yield_cells = parse_millions(
-            request.form.get("measured_yield_millions")
+        pre_split_value, error = parse_percent(
+            form.get("pre_split_confluence_percent"),
+            "Enter a valid confluency percentage (0–100).",
+            CONFLUENCE_RANGE_ERROR,
         )
-        pre_split_raw = request.form.get("pre_split_confluence_percent")
-        if pre_split_raw in (None, ""):
-            passage.pre_split_confluence_percent = None
-        else:
-            cleaned = pre_split_raw.strip()
-            if not cleaned:
-                passage.pre_split_confluence_percent = None
-            else:
-                numeric = parse_numeric(cleaned)
-                if numeric is not None:
-                    rounded = int(round(numeric))
-                    if 0 <= rounded <= 100:
-                        passage.pre_split_confluence_percent = rounded
-                    else:
-                        flash("Confluency should be between 0 and 100%.", "error")
-                        return redirect(url_for("edit_passage", passage_id=passage.id))
-                else:
-                    flash("Enter a valid confluency percentage (0–100).", "error")
-                    return redirect(url_for("edit_passage", passage_id=passage.id))
+        if error:
+            flash(error, "error")
+            return redirect(url_for("edit_passage", passage_id=passage.id))
+        passage.pre_split_confluence_percent = pre_split_value
 
-        myco_status = request.form.get("myco_status") or ""
-        valid_statuses = {choice[0] for choice in MYCO_STATUS_CHOICES}
-        if myco_status in valid_statuses:
+        myco_status = form.get("myco_status") or ""
+        if myco_status in MYCO_STATUS_VALUES:
             passage.myco_status = myco_status
 
         db.session.commit()
@@ -2692,13 +3043,12 @@ def edit_passage(passage_id: int):
         )
         return redirect(url_for("view_culture", culture_id=culture.id))
 
-    vessels = Vessel.query.order_by(Vessel.area_cm2.asc()).all()
+    vessels = get_vessels()
     return render_template(
         "edit_passage.html",
         passage=passage,
         culture=culture,
         vessels=vessels,
-        today=date.today(),
         myco_status_choices=MYCO_STATUS_CHOICES,
     )
 
@@ -2706,20 +3056,41 @@ def edit_passage(passage_id: int):
 @app.route("/passage/<int:passage_id>/delete", methods=["POST"])
 @login_required
 def delete_passage(passage_id: int):
-    passage = Passage.query.get_or_404(passage_id)
-    culture = get_user_culture_or_404(passage.culture_id)
-    db.session.delete(passage)
+    owned_cultures = select(Culture.id).where(Culture.user_id == current_user.id)
+    owned_passage = (Passage.id == passage_id, Passage.culture_id.in_(owned_cultures))
+    if db.engine.dialect.delete_returning:
+        deleted = db.session.execute(
+            delete(Passage)
+            .where(*owned_passage)
+            .returning(Passage.passage_number, Passage.culture_id),
+            execution_options={"synchronize_session": False},
+        ).first()
+    else:
+        # SQLite before 3.35 has no DELETE ... RETURNING, so read the row first
+        deleted = db.session.execute(
+            select(Passage.passage_number, Passage.culture_id).where(*owned_passage)
+        ).first()
+        if deleted is not None:
+            db.session.execute(
+                delete(Passage).where(Passage.id == passage_id),
+                execution_options={"synchronize_session": False},
+            )
+    if deleted is None:
+        abort(404)
     db.session.commit()
+
+    passage_number, culture_id = deleted
+    culture_name = db.session.scalar(select(Culture.name).where(Culture.id == culture_id))
     flash(
-        f"Deleted passage P{passage.passage_number} from culture '{culture.name}'.",
+        f"Deleted passage P{passage_number} from culture '{culture_name}'.",
         "success",
     )
-    return redirect(url_for("view_culture", culture_id=culture.id))
+    return redirect(url_for("view_culture", culture_id=culture_id))
 
 
 @app.context_processor
 def inject_helpers():
-    return {"format_cells": format_cells, "format_hours": format_hours}
+    return {"format_cells": format_cells, "format_hours": format_hours, "today": date.today()}
 
 
 with app.app_context():
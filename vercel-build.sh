@@ -2,3 +2,6 @@
 echo "Copying static files for Vercel..."
 mkdir -p public
 cp -r api/static/* public/
+
+echo "Precompiling Python bytecode..."
+python -m compileall -q api app.py